@@ -1,10 +1,14 @@
 import pypsa
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend, also used by plotting worker processes
 import matplotlib.pyplot as plt
 import yaml
 import os
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import Dict, Any
 
 # Configure logging
@@ -59,10 +63,9 @@ def create_network(config: dict, demand: pd.DataFrame) -> pypsa.Network:
     network.set_snapshots(demand.index)
 
     # Add buses with normalized carrier names
-    for bus in config['network']['buses']:
-        network.add("Bus", bus,
-                    v_nom=config['network']['base_voltage'],
-                    carrier=config['network'].get('bus_carrier', 'AC').lower())
+    network.add("Bus", config['network']['buses'],
+                v_nom=config['network']['base_voltage'],
+                carrier=config['network'].get('bus_carrier', 'AC').lower())
     return network
 
 
@@ -70,52 +73,67 @@ def add_transmission(network: pypsa.Network, transmission_data: pd.DataFrame, co
     """Add transmission lines with normalized carrier names"""
     line_carrier = config['network'].get('line_carrier', 'AC').lower()
 
-    for _, line in transmission_data.iterrows():
-        network.add("Line",
-                    name=line["name"],
-                    bus0=line["bus0"],
-                    bus1=line["bus1"],
-                    x=line["reactance"],
-                    r=line["resistance"],
-                    s_nom=line["capacity"],
-                    carrier=line_carrier)
+    network.add("Line",
+                transmission_data["name"].to_numpy(),
+                bus0=transmission_data["bus0"].to_numpy(),
+                bus1=transmission_data["bus1"].to_numpy(),
+                x=transmission_data["reactance"].to_numpy(),
+                r=transmission_data["resistance"].to_numpy(),
+                s_nom=transmission_data["capacity"].to_numpy(),
+                carrier=line_carrier)
 
 
 def add_generators(network: pypsa.Network, plants: pd.DataFrame, config: dict) -> Dict[str, str]:
     """Add generators with fuel consistency checks"""
-    fuel_map = {}
-    seen_names = set()
-
-    for _, plant in plants.iterrows():
-        if plant["name"] in seen_names:
-            raise ValueError(f"Duplicate generator name: {plant['name']}")
-        seen_names.add(plant["name"])
-
-        fuel = plant["fuel"].lower()  # Normalize to lowercase
-        if fuel not in config['fuels']:
-            raise ValueError(f"Undeclared fuel type: {fuel}")
-
-        constraints = config['fuels'][fuel]
-        hours = network.snapshots.hour
-        mask = (hours >= constraints["hour_min"]) & (hours <= constraints["hour_max"])
-
-        # Create capacity factors
-        p_max_pu = pd.Series(0.0, index=network.snapshots)
-        p_max_pu.loc[mask] = constraints["max_capacity_factor"]
-
-        p_min_pu = pd.Series(constraints["min_capacity_factor"], index=network.snapshots)
-
-        network.add("Generator",
-                    name=plant["name"],
-                    bus=plant["bus"],
-                    p_nom=plant["capacity"],
-                    marginal_cost=plant["cost"],
-                    carrier=fuel,
-                    p_max_pu=p_max_pu,
-                    p_min_pu=p_min_pu)
-        fuel_map[plant["name"]] = fuel
-
-    return fuel_map
+    duplicates = plants.loc[plants["name"].duplicated(), "name"]
+    if not duplicates.empty:
+        raise ValueError(f"Duplicate generator name: {duplicates.iloc[0]}")
+
+    names = plants["name"].to_numpy()
+    fuels = plants["fuel"].str.lower().to_numpy()  # Normalize to lowercase
+    undeclared = set(fuels) - set(config['fuels'])
+    if undeclared:
+        raise ValueError(f"Undeclared fuel type: {', '.join(sorted(undeclared))}")
+
+    # Constraints of the fuels in use; every one of them must define all limits
+    required = ["hour_min", "hour_max", "max_capacity_factor", "min_capacity_factor"]
+    fuel_constraints = pd.DataFrame.from_dict(config['fuels'], orient='index').reindex(
+        index=pd.unique(fuels), columns=required)
+    incomplete = fuel_constraints.isna()
+    if incomplete.to_numpy().any():
+        missing = [f"{fuel}: {', '.join(incomplete.columns[row])}"
+                   for fuel, row in zip(incomplete.index, incomplete.to_numpy()) if row.any()]
+        raise ValueError(f"Incomplete fuel constraints for {'; '.join(missing)}")
+
+    # Hour-of-day availability mask of shape (snapshots, fuels), shared by all plants
+    hours = network.snapshots.hour.to_numpy().astype(np.int8)
+    hour_min = fuel_constraints["hour_min"].to_numpy().astype(np.int8)
+    hour_max = fuel_constraints["hour_max"].to_numpy().astype(np.int8)
+    mask = (hours[:, None] >= hour_min[None, :]) & (hours[:, None] <= hour_max[None, :])
+
+    # Create capacity factors by picking each plant's fuel column
+    fuel_idx = fuel_constraints.index.get_indexer(fuels)
+    max_cf = fuel_constraints["max_capacity_factor"].to_numpy()[fuel_idx]
+    min_cf = fuel_constraints["min_capacity_factor"].to_numpy()[fuel_idx]
+
+    # Add all generators in a single batch call with static capacity factors
+    network.add("Generator",
+                names,
+                bus=plants["bus"].to_numpy(),
+                p_nom=plants["capacity"].to_numpy(),
+                marginal_cost=plants["cost"].to_numpy(),
+                carrier=fuels,
+                p_max_pu=max_cf,
+                p_min_pu=min_cf)
+
+    # Only plants whose fuel is unavailable at some hours need a p_max_pu time series
+    windowed = ~mask.all(axis=0)[fuel_idx]
+    if windowed.any():
+        network.generators_t.p_max_pu = pd.DataFrame(
+            mask[:, fuel_idx[windowed]] * max_cf[windowed],
+            index=network.snapshots, columns=names[windowed])
+
+    return dict(zip(names, fuels))
 
 
 def process_results(results: Dict[int, Dict[str, Any]], config: dict) -> Dict[int, Dict[str, Any]]:
@@ -129,24 +147,26 @@ def process_results(results: Dict[int, Dict[str, Any]], config: dict) -> Dict[in
             continue
 
         try:
-            # Ensure consistent fuel mapping
-            gen = data["generation"].rename(columns=data["fuel_map"])
-
-            # Group by fuel type (case-insensitive)
-            gen = gen.groupby(lambda x: x.lower(), axis=1).sum()
-
-            # Add missing fuels and enforce order
-            for fuel in fuel_order:
-                if fuel not in gen.columns:
-                    gen[fuel] = 0.0
-            gen = gen[fuel_order]
-
-            # Add time features
-            gen["hour"] = gen.index.hour
-            gen["month"] = gen.index.month
+            # Map each generator to its fuel column (case-insensitive), -1 if not ordered
+            generation = data["generation"]
+            fuels = pd.Series(data["fuel_map"]).reindex(generation.columns).str.lower()
+            col_idx = pd.Categorical(fuels, categories=fuel_order).codes
+
+            # Sum generators per fuel with a (generators x fuels) indicator matrix,
+            # skipping NaN like groupby().sum(); fuels without generators come out
+            # as zero columns in fuel order
+            indicator = np.zeros((len(col_idx), len(fuel_order)))
+            ordered = np.flatnonzero(col_idx >= 0)
+            indicator[ordered, col_idx[ordered]] = 1.0
+            gen = pd.DataFrame(generation.fillna(0.0).to_numpy() @ indicator,
+                               index=generation.index,
+                               columns=pd.Index(fuel_order, name=generation.columns.name))
 
             processed[year] = {
                 "hourly": gen,
+                # Time features kept alongside the frame rather than as extra columns
+                "hour": gen.index.hour.to_numpy(),
+                "month": gen.index.month.to_numpy(),
                 "total_cost": data["total_cost"],
                 "status": "optimal",
                 "peak_demand": data["peak_demand"],
@@ -160,37 +180,20 @@ def process_results(results: Dict[int, Dict[str, Any]], config: dict) -> Dict[in
     return processed
 
 
-def plot_results(results: dict, config: dict) -> None:
-    """Generate visualizations with safe fuel ordering"""
-    vis = config['visualization']
-    fuel_order = [f.lower() for f in vis['fuel_order']]  # Normalized order
-    os.makedirs(vis['output_dir'], exist_ok=True)
-
-    # Configure plot style
+def apply_plot_style(vis: dict) -> None:
+    """Apply the configured matplotlib style in the current process"""
     plt.style.use(vis.get('style', 'seaborn-v0_8-darkgrid'))
     plt.rcParams.update({'font.size': vis.get('font_size', 12)})
 
-    # Yearly generation mix plot
-    valid_years = [y for y, d in results.items() if d.get("status") == "optimal"]
-    if valid_years:
-        yearly_totals = pd.DataFrame({
-            y: results[y]["hourly"][fuel_order].sum()
-            for y in valid_years
-        }).T.fillna(0)
 
-        fig, ax = plt.subplots(figsize=vis['figure_size'])
-        yearly_totals.plot(kind="area", ax=ax,
-                           color=vis['colors'],
-                           stacked=True, alpha=vis.get('alpha', 0.85))
-        ax.set_title(vis.get('yearly_title', 'Yearly Generation Mix'))
-        ax.set_ylabel(vis.get('yearly_ylabel', 'Generation (GWh)'))
-        plt.savefig(os.path.join(vis['output_dir'], 'yearly_generation_mix.png'),
-                    dpi=vis.get('dpi', 300), bbox_inches='tight')
-        plt.close()
+def plot_hourly_profiles(items: list, vis: dict) -> None:
+    """Render hourly generation profiles of several years on one reused figure"""
+    apply_plot_style(vis)
+    fuel_order = [f.lower() for f in vis['fuel_order']]  # Normalized order
 
-    # Hourly profiles with error handling
-    for year, data in results.items():
-        fig, ax = plt.subplots(figsize=vis['figure_size'])
+    fig, ax = plt.subplots(figsize=vis['figure_size'])
+    for year, data in items:
+        ax.clear()
         if data.get("status") != "optimal":
             error_text = "\n".join([
                 f"Status: {data.get('status', 'unknown')}",
@@ -202,42 +205,84 @@ def plot_results(results: dict, config: dict) -> None:
                     transform=ax.transAxes, fontsize=12, color='red')
             ax.set_title(f"{year} - Processing Failed")
         else:
-            hourly = data["hourly"].groupby("hour").mean()[fuel_order]
+            hourly = data["hourly"].groupby(data["hour"]).mean()[fuel_order]
             hourly.plot(kind='area', ax=ax, color=vis['colors'],
                         stacked=True, alpha=vis.get('alpha', 0.85))
             ax.set_title(f"{vis.get('hourly_title', 'Hourly Generation')} - {year}")
             ax.set_xlabel(vis.get('hourly_xlabel', 'Hour of Day'))
             ax.set_ylabel(vis.get('hourly_ylabel', 'Power (MW)'))
 
-        plt.savefig(os.path.join(vis['output_dir'], f'hourly_generation_{year}.png'),
+        fig.savefig(os.path.join(vis['output_dir'], f'hourly_generation_{year}.png'),
+                    dpi=vis.get('dpi', 300), bbox_inches='tight')
+    plt.close(fig)
+
+
+def plot_results(results: dict, config: dict) -> None:
+    """Generate visualizations with safe fuel ordering"""
+    vis = config['visualization']
+    fuel_order = [f.lower() for f in vis['fuel_order']]  # Normalized order
+    os.makedirs(vis['output_dir'], exist_ok=True)
+
+    # Configure plot style
+    apply_plot_style(vis)
+
+    # Yearly generation mix plot
+    valid_years = [y for y, d in results.items() if d.get("status") == "optimal"]
+    if valid_years:
+        yearly_totals = pd.DataFrame(
+            np.vstack([np.nansum(results[y]["hourly"][fuel_order].to_numpy(), axis=0)
+                       for y in valid_years]),
+            index=valid_years,
+            columns=results[valid_years[0]]["hourly"][fuel_order].columns)
+
+        fig, ax = plt.subplots(figsize=vis['figure_size'])
+        yearly_totals.plot(kind="area", ax=ax,
+                           color=vis['colors'],
+                           stacked=True, alpha=vis.get('alpha', 0.85))
+        ax.set_title(vis.get('yearly_title', 'Yearly Generation Mix'))
+        ax.set_ylabel(vis.get('yearly_ylabel', 'Generation (GWh)'))
+        fig.savefig(os.path.join(vis['output_dir'], 'yearly_generation_mix.png'),
                     dpi=vis.get('dpi', 300), bbox_inches='tight')
-        plt.close()
+        plt.close(fig)
+
+    # Hourly profiles are independent, so render and encode them in parallel processes;
+    # each worker draws its share of the years on a single reused figure
+    if results:
+        items = list(results.items())
+        max_workers = max(1, min(len(items), os.cpu_count() or 1))
+        batches = [items[i::max_workers] for i in range(max_workers)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(plot_hourly_profiles, batches, repeat(vis)))
 
 
 def add_loads(network: pypsa.Network, demand: pd.DataFrame, config: dict) -> None:
     """Add loads with validation"""
-    for bus in config['network']['buses']:
-        if bus not in demand.columns:
-            raise ValueError(f"Missing demand data for bus {bus}")
-        network.add("Load",
-                    name=f"{bus}_load",
-                    bus=bus,
-                    p_set=demand[bus].astype(np.float64)
-                    )
+    buses = config['network']['buses']
+    missing = [bus for bus in buses if bus not in demand.columns]
+    if missing:
+        raise ValueError(f"Missing demand data for bus {', '.join(missing)}")
+
+    load_names = [f"{bus}_load" for bus in buses]
+    network.add("Load",
+                load_names,
+                bus=buses,
+                p_set=demand[buses].astype(np.float64).set_axis(load_names, axis=1)
+                )
+
+
 def add_import_generators(network: pypsa.Network, config: dict) -> Dict[str, str]:
     """Add import generators and extend fuel map"""
-    fuel_map = {}
-    for bus in config['network']['buses']:
-        gen_name = f"{bus}_import"
-        network.add("Generator",
-                    name=gen_name,
-                    bus=bus,
-                    p_nom=1e6,
-                    marginal_cost=200,
-                    carrier="import"
-                    )
-        fuel_map[gen_name] = "import"
-    return fuel_map
+    buses = config['network']['buses']
+    gen_names = [f"{bus}_import" for bus in buses]
+    network.add("Generator",
+                gen_names,
+                bus=buses,
+                p_nom=1e6,
+                marginal_cost=200,
+                carrier="import"
+                )
+    return dict.fromkeys(gen_names, "import")
+
 
 def check_system_adequacy(network: pypsa.Network, year: int) -> None:
     """Validate system capacity meets demand"""
@@ -251,101 +296,142 @@ def check_system_adequacy(network: pypsa.Network, year: int) -> None:
     if total_capacity < peak_demand:
         raise ValueError(f"Insufficient capacity in {year}: Deficit {peak_demand - total_capacity:.2f} MW")
 
+
+def solve_year(year: int, demand_year: pd.DataFrame, plants_year: pd.DataFrame,
+               transmission_data: pd.DataFrame, config: dict) -> Dict[str, Any]:
+    """Build and optimize the network for a single year"""
+    try:
+        logging.info(f"\n{'=' * 40}\nProcessing {year}\n{'=' * 40}")
+
+        # Data validation
+        validate_data(year, demand_year, plants_year, config)
+
+        # Create network
+        network = create_network(config, demand_year)
+        add_transmission(network, transmission_data, config)
+        fuel_map = add_generators(network, plants_year, config)
+        add_loads(network, demand_year, config)
+        fuel_map.update(add_import_generators(network, config))
+
+        # Validate system adequacy
+        check_system_adequacy(network, year)
+
+        # Solve network
+        solver = config.get('solver', {})
+        network.optimize(solver_name=solver.get('name', 'highs'),
+                         solver_options=solver.get('options', {}),
+                         io_api=solver.get('io_api'))
+
+        # Store results
+        if network.model.status == "ok" and network.model.termination_condition == "optimal":
+            return {
+                "generation": network.generators_t.p,
+                "total_cost": network.model.objective.value / 1e6,
+                "status": "optimal",
+                "fuel_map": fuel_map,
+                "peak_demand": network.loads_t.p_set.sum(axis=1).max(),
+                "capacity": network.generators.p_nom.sum()
+            }
+        raise RuntimeError(f"Optimization failed: {network.model.status} "
+                           f"({network.model.termination_condition})")
+
+    except Exception as e:
+        logging.error(f"Error processing {year}: {str(e)}")
+        return {
+            "generation": pd.DataFrame(),
+            "total_cost": np.nan,
+            "status": "failed",
+            "fuel_map": {},
+            "message": str(e),
+            "peak_demand": demand_year.sum().sum() if not demand_year.empty else np.nan,
+            "capacity": plants_year["capacity"].sum() if not plants_year.empty else np.nan
+        }
+
+
 def run_simulation(years: list, config: dict) -> Dict[int, Dict[str, Any]]:
     """Main simulation workflow with enhanced error handling"""
-    results = {}
-
-    # Load input data
+    # Load input data (multithreaded pyarrow CSV parser)
     demand_data = pd.read_csv(config['data_paths']['demand'],
+                              engine="pyarrow",
                               parse_dates=["timestamp"],
                               index_col="timestamp")
-    plants = pd.read_csv(config['data_paths']['power_plants'])
-    transmission_data = pd.read_csv(config['data_paths']['transmission'])
-
-    for year in years:
-        try:
-            logging.info(f"\n{'=' * 40}\nProcessing {year}\n{'=' * 40}")
-
-            # Filter yearly data
-            demand_year = demand_data[demand_data.index.year == year]
-            plants_year = plants[plants["year"] == year].copy()
-
-            # Data validation
-            validate_data(year, demand_year, plants_year, config)
-
-            # Create network
-            network = create_network(config, demand_year)
-            add_transmission(network, transmission_data, config)
-            fuel_map = add_generators(network, plants_year, config)
-            add_loads(network, demand_year, config)
-            fuel_map.update(add_import_generators(network, config))
-
-            # Validate system adequacy
-            check_system_adequacy(network, year)
-
-            # Solve network
-            network.optimize(solver_name='highs')
-
-            # Store results
-            if network.model.status == "ok":
-                results[year] = {
-                    "generation": network.generators_t.p.copy(),
-                    "total_cost": network.model.objective.value / 1e6,
-                    "status": "optimal",
-                    "fuel_map": fuel_map,
-                    "peak_demand": network.loads_t.p_set.sum(axis=1).max(),
-                    "capacity": network.generators.p_nom.sum()
-                }
-            else:
-                raise RuntimeError(f"Optimization failed: {network.model.status}")
-
-        except Exception as e:
-            logging.error(f"Error processing {year}: {str(e)}")
-            results[year] = {
-                "generation": pd.DataFrame(),
-                "total_cost": np.nan,
-                "status": "failed",
-                "fuel_map": {},
-                "message": str(e),
-                "peak_demand": demand_year.sum().sum() if not demand_year.empty else np.nan,
-                "capacity": plants_year["capacity"].sum() if not plants_year.empty else np.nan
-            }
-
-    return results
+    plants = pd.read_csv(config['data_paths']['power_plants'], engine="pyarrow")
+    transmission_data = pd.read_csv(config['data_paths']['transmission'], engine="pyarrow")
+
+    # Locate each year's demand rows by binary search on the sorted index
+    if not demand_data.index.is_monotonic_increasing:
+        demand_data = demand_data.sort_index()
+    demand_years = demand_data.index.year.to_numpy()
+    starts = np.searchsorted(demand_years, years, side="left")
+    ends = np.searchsorted(demand_years, years, side="right")
+
+    # Split plants by year in a single pass
+    plants_by_year = dict(tuple(plants.groupby("year")))
+
+    # Years are independent optimizations, so solve them in parallel processes
+    max_workers = config['simulation'].get('max_workers') or os.cpu_count() or 1
+    max_workers = max(1, min(len(years), max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            year: executor.submit(solve_year, year,
+                                  demand_data.iloc[start:end],
+                                  plants_by_year.get(year, plants.iloc[:0]),
+                                  transmission_data, config)
+            for year, start, end in zip(years, starts, ends)
+        }
+        return {year: future.result() for year, future in futures.items()}
 
 
 def format_results(processed_data: dict, config: dict) -> None:
     """Print formatted simulation results to console"""
     border = "=" * 42
+    power_unit = config['visualization']['units']['power']
+    energy_unit = config['visualization']['units']['energy']
+    fuel_order = config['visualization']['fuel_order']
+
+    # Collect the report and write it to stdout in one go
+    lines = []
     for year, data in processed_data.items():
         # Handle failed simulations
         if data.get("status") != "optimal":
-            print(f"\n{border}\n Simulation Results: {year} - INFEASIBLE\n{border}")
-            print(f"Reason: {data.get('message', 'Unknown error')}")
-            print(f"Peak Demand: {data.get('peak_demand', 0):,.0f} {config['visualization']['units']['power']}")
-            print(f"Available Capacity: {data.get('capacity', 0):,.0f} {config['visualization']['units']['power']}")
+            lines += [
+                "",
+                border,
+                f" Simulation Results: {year} - INFEASIBLE",
+                border,
+                f"Reason: {data.get('message', 'Unknown error')}",
+                f"Peak Demand: {data.get('peak_demand', 0):,.0f} {power_unit}",
+                f"Available Capacity: {data.get('capacity', 0):,.0f} {power_unit}"
+            ]
             continue
 
         # Calculate generation statistics
-        hourly_data = data["hourly"].drop(columns=["hour", "month"], errors="ignore")
+        hourly_data = data["hourly"]
         total_gen = hourly_data.sum().sum()
         fuel_mix = hourly_data.sum()
 
         # Get ordered fuel list from config
-        fuel_order = config['visualization']['fuel_order']
         ordered_fuels = [f for f in fuel_order if f in fuel_mix.index]
 
-        print(f"\n{border}\n Simulation Results: {year}\n{border}")
-        print(f"Total System Cost: €{data['total_cost']:.2f}M")
-        print(f"Peak Demand: {data.get('peak_demand', 'N/A'):,.0f} {config['visualization']['units']['power']}")
-        print(f"Total Generation: {total_gen:,.0f} {config['visualization']['units']['energy']}\n")
-
-        print("Generation Mix:")
+        lines += [
+            "",
+            border,
+            f" Simulation Results: {year}",
+            border,
+            f"Total System Cost: €{data['total_cost']:.2f}M",
+            f"Peak Demand: {data.get('peak_demand', 'N/A'):,.0f} {power_unit}",
+            f"Total Generation: {total_gen:,.0f} {energy_unit}",
+            "",
+            "Generation Mix:"
+        ]
         for i, fuel in enumerate(ordered_fuels):
             prefix = "└──" if i == len(ordered_fuels) - 1 else "├──"
             percentage = (fuel_mix[fuel] / total_gen * 100).round(1)
-            print(f"{prefix} {fuel.title():<6} {percentage:>5.1f}% "
-                  f"({fuel_mix[fuel]:,.0f} {config['visualization']['units']['energy']})")
+            lines.append(f"{prefix} {fuel.title():<6} {percentage:>5.1f}% "
+                         f"({fuel_mix[fuel]:,.0f} {energy_unit})")
+
+    if lines:
+        print("\n".join(lines))
 
 
 # In main execution